@@ -5,6 +5,7 @@ import io
 # Import the core logic functions
 from m3u_epg_core import (
     fetch_content, 
+    fetch_content_bytes,
     check_m3u, # This check_m3u will now accept a 'mode' argument
     apply_m3u_fixes, 
     check_epg,
@@ -26,7 +27,7 @@ def check_m3u_epg_compatibility(m3u_channels, epg_channels):
     compatibility_issues = []
     channels_dvr_advice = []
 
-    m3u_tvg_ids = {c['tvg_id'] for c in m3u_channels if c['tvg_id']}
+    m3u_tvg_ids = {c.tvg_id for c in m3u_channels if c.tvg_id}
     epg_channel_ids = set(epg_channels.keys())
 
     # Flag to track if any Gracenote IDs were found when EPG is missing
@@ -34,12 +35,12 @@ def check_m3u_epg_compatibility(m3u_channels, epg_channels):
 
     # 1. Channels in M3U without matching EPG data
     for m3u_channel in m3u_channels:
-        if m3u_channel['tvg_id']:
-            if m3u_channel['tvg_id'] not in epg_channel_ids:
-                compatibility_issues.append(f"Compatibility Warning: M3U channel '{m3u_channel['name']}' (tvg-id: '{m3u_channel['tvg_id']}') has no matching EPG data found by 'tvg-id'. This channel might not show guide data in Channels DVR.")
+        if m3u_channel.tvg_id:
+            if m3u_channel.tvg_id not in epg_channel_ids:
+                compatibility_issues.append(f"Compatibility Warning: M3U channel '{m3u_channel.name}' (tvg-id: '{m3u_channel.tvg_id}') has no matching EPG data found by 'tvg-id'. This channel might not show guide data in Channels DVR.")
                 
                 # If no EPG was provided AND this tvg-id looks like Gracenote
-                if not epg_channels and is_gracenote_id(m3u_channel['tvg_id']):
+                if not epg_channels and is_gracenote_id(m3u_channel.tvg_id):
                     gracenote_ids_found_without_epg = True
         else:
             pass 
@@ -128,11 +129,13 @@ def upload_file():
         if not (epg_file.filename.lower().endswith('.xml') or epg_file.filename.lower().endswith('.xmltv')):
             epg_errors.append("Invalid EPG file extension. Please upload a .xml or .xmltv file.")
         else:
-            fetched_content, fetch_msgs = fetch_content('file', epg_file)
+            # EPG bytes go straight to the XML parser, which handles decoding itself;
+            # check_epg falls back to a lenient UTF-8 decode if the bytes are not valid
+            fetched_content, fetch_msgs = fetch_content_bytes('file', epg_file)
             epg_content = fetched_content
             epg_errors.extend(fetch_msgs)
     elif epg_url and epg_url.strip():
-        fetched_content, fetch_msgs = fetch_content('url', epg_url)
+        fetched_content, fetch_msgs = fetch_content_bytes('url', epg_url)
         epg_content = fetched_content
         epg_errors.extend(fetch_msgs)
     # EPG is optional, so no 'else' error for missing EPG
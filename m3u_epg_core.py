@@ -1,59 +1,197 @@
+import codecs
 import re
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from itertools import compress, count, islice
+from operator import gt, itemgetter
 from lxml import etree
 import io
 
-def fetch_content(source_type, source_value):
+# Shared connection pools so repeated fetches from the same provider reuse keep-alive
+# connections instead of paying a new TCP/TLS handshake each time.
+_HTTPS_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=1)
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=1)
+
+def _new_session():
     """
-    Fetches content from an uploaded file or a URL.
-    Returns (content_string, list_of_errors).
+    Returns a fresh Session that sends requests through the shared adapters. Each fetch gets its
+    own session so cookies (and other session state) never carry over between users or threads.
+    The session is not closed afterwards, as that would also close the shared adapters.
+    """
+    session = requests.Session()
+    session.headers['User-Agent'] = 'm3u-epg-checker'
+    session.mount('https://', _HTTPS_ADAPTER)
+    session.mount('http://', _HTTP_ADAPTER)
+    return session
+
+# Strings at least this long are never interned, so arbitrary input cannot bloat the intern table.
+_INTERN_MAX_LEN = 128
+
+# Precompiled patterns for the per-EXTINF hot path. Attribute pairs may be separated by any
+# Unicode whitespace (NBSP, em space, ...), so \S must keep its Unicode meaning here.
+_ATTR_RE = re.compile(r'(\S+)="([^"]*)"')
+_SANITIZE_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_SANITIZE_SEPARATORS_RE = re.compile(r'[\s-]+')
+# ASCII translation equivalent to the two patterns above plus lower(), minus the run collapsing.
+_SANITIZE_ASCII_TABLE = {
+    code: (' ' if re.match(r'\s', char) else
+           char.lower() if re.match(r'[\w-]', char) else
+           None)
+    for code, char in enumerate(map(chr, range(128)))
+}
+# The line boundaries recognised by str.splitlines().
+_LINE_BREAK_RE = re.compile(r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+# Serialization order for the attributes Channels DVR cares about; any others follow alphabetically.
+_EXTINF_ATTRIBUTE_ORDER = ('tvg-id', 'tvg-name', 'tvg-logo', 'group-title', 'tvc-guide-title')
+_EXTINF_ATTRIBUTE_ORDER_SET = frozenset(_EXTINF_ATTRIBUTE_ORDER)
+_GRACENOTE_RE = re.compile(r"^(?:EP|MV|SH|GR)\d{8,}(?:\.[FS]\.EP)?$|^\d{8,}$")
+_GRACENOTE_PREFIXES = ('EP', 'MV', 'SH', 'GR')
+_DIGITS_RE = re.compile(r'\d+')
+
+# Display-name cleanup steps, applied in this order by get_clean_display_name().
+_DOUBLE_DASH_SUFFIX_RE = re.compile(r'\s+--\s+.*$')
+_DASH_SUFFIX_RE = re.compile(r'\s+-\s+.*$')
+_COLON_SUFFIX_RE = re.compile(r'\s*:\s+.*$')
+_PAREN_SUFFIX_RE = re.compile(r'\s*\(.*\)$')
+_SIMPLE_PAREN_SUFFIX_RE = re.compile(r'\s*\([^\)]*\)$')
+_BRACKET_SUFFIX_RE = re.compile(r'\s*\[.*\]$')
+# Matches wherever any of the five suffix patterns above would, so one scan can rule them all out.
+_DESCRIPTION_SUFFIX_RE = re.compile(r'\s+--\s+.*$|\s+-\s+.*$|\s*:\s+.*$|\s*\(.*\)$|\s*\[.*\]$')
+_SURROUNDING_QUOTE_RE = re.compile(r'^\"|\"$')
+# Deletes double and single quotes in one str.translate() pass.
+_QUOTE_TABLE = str.maketrans('', '', '"\'')
+_QUALITY_SUFFIX_RE = re.compile(r'\s+(HD|SD|Live|TV|Channel|Show|Movie|Series|Now)\s*$', re.IGNORECASE)
+_DISPLAY_NAME_DISALLOWED_RE = re.compile(r'[^\w\s.,&+\-:]')
+
+@dataclass(slots=True)
+class Channel:
+    """A parsed M3U channel entry, as returned by check_m3u."""
+    name: str
+    tvg_id: str
+    tvg_name: str
+    tvg_logo: str
+    group_title: str
+    stream_url: str
+
+@dataclass(slots=True)
+class Program:
+    """A parsed EPG programme entry, as returned by check_epg."""
+    channel_id: str
+    start: str
+    stop: str
+    title: str
+
+def _fetch_url(url, consume_chunks):
+    """
+    Streams a URL body and hands its byte chunks to consume_chunks, so callers decide how
+    the body is accumulated instead of it being buffered whole first.
+    Returns (consume_chunks(chunks), list_of_errors).
+    """
+    try:
+        # Separate connect/read timeouts: fail fast on dead hosts, but allow slow CDNs
+        # a generous gap between chunks of a large download.
+        with _new_session().get(url, timeout=(5, 30), stream=True) as response:
+            response.raise_for_status()
+            return consume_chunks(response.iter_content(chunk_size=65536)), []
+    except requests.exceptions.RequestException as e:
+        return None, [f"Error fetching URL '{url}': {e}"]
+    except Exception as e:
+        return None, [f"An unexpected error occurred while fetching URL '{url}': {e}"]
+
+def _decode_utf8_chunks(chunks):
+    """
+    Decodes UTF-8 byte chunks as they arrive, so each raw chunk can be released once decoded.
+    Invalid sequences are replaced, giving the same text as decoding the whole body at once.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parts = [decoder.decode(chunk) for chunk in chunks]
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+def fetch_content_bytes(source_type, source_value):
+    """
+    Fetches raw, undecoded bytes from an uploaded file or a URL.
+    URL responses are streamed in chunks so the body is only held once in memory.
+    Returns (content_bytes, list_of_errors).
     """
     if source_type == 'file':
         try:
             # Assuming source_value is a file-like object (e.g., from open())
-            return source_value.read().decode('utf-8', errors='ignore'), []
+            return source_value.read(), []
         except Exception as e:
             return None, [f"Error reading file: {e}"]
     elif source_type == 'url':
-        try:
-            response = requests.get(source_value, timeout=10)
-            response.raise_for_status()
-            return response.text, []
-        except requests.exceptions.RequestException as e:
-            return None, [f"Error fetching URL '{source_value}': {e}"]
-        except Exception as e:
-            return None, [f"An unexpected error occurred while fetching URL '{source_value}': {e}"]
+        return _fetch_url(source_value, b"".join)
     return None, ["Invalid source type provided."]
 
+def fetch_content(source_type, source_value):
+    """
+    Fetches content from an uploaded file or a URL and decodes it as UTF-8.
+    Returns (content_string, list_of_errors).
+    """
+    if source_type == 'url':
+        # Decode while downloading rather than joining the whole body as bytes first
+        return _fetch_url(source_value, _decode_utf8_chunks)
+    content_bytes, errors = fetch_content_bytes(source_type, source_value)
+    if content_bytes is None:
+        return None, errors
+    try:
+        # Strict decoding keeps CPython's fast path for clean UTF-8, the overwhelmingly common case
+        return content_bytes.decode('utf-8'), errors
+    except UnicodeDecodeError:
+        return content_bytes.decode('utf-8', errors='replace'), errors
+
 def sanitize_channel_name_for_id(name):
     """
     Sanitizes a channel name to be used as a tvg-id.
     Removes non-alphanumeric, replaces spaces/underscores with underscores, lowercase.
     """
-    sane_name = re.sub(r'[^\w\s-]', '', name).strip()
-    sane_name = re.sub(r'[\s-]+', '_', sane_name)
+    if name.isascii():
+        # Fast path: one translate pass drops disallowed characters, lowercases and
+        # normalises whitespace to ' '; separator runs are then collapsed with split/join.
+        sane_name = name.translate(_SANITIZE_ASCII_TABLE).strip(' ')
+        if not sane_name:
+            return sane_name
+        collapsed = '_'.join(sane_name.replace('-', ' ').split())
+        if not collapsed:
+            return '_'
+        if sane_name[0] == '-':
+            collapsed = '_' + collapsed
+        if sane_name[-1] == '-':
+            collapsed += '_'
+        return collapsed
+
+    sane_name = _SANITIZE_NON_WORD_RE.sub('', name).strip()
+    sane_name = _SANITIZE_SEPARATORS_RE.sub('_', sane_name)
     sane_name = sane_name.lower()
     return sane_name
 
 def format_attributes_for_extinf(attributes_dict):
     """
     Formats a dictionary of attributes into a string for an EXTINF line.
-    Ensures values are properly quoted, escaping internal quotes if necessary.
+    The common attributes come first in a fixed order, followed by any others alphabetically.
+    Ensures values are properly quoted, escaping internal double quotes.
     """
-    formatted_attrs = []
-    for key in sorted(attributes_dict.keys()):
+    ordered_keys = [key for key in _EXTINF_ATTRIBUTE_ORDER if key in attributes_dict]
+    if len(ordered_keys) != len(attributes_dict):
+        ordered_keys.extend(sorted(attributes_dict.keys() - _EXTINF_ATTRIBUTE_ORDER_SET))
+    # Assembled as flat pieces with a single join at the end, rather than one f-string per attribute
+    parts = []
+    for key in ordered_keys:
         value = attributes_dict[key]
-        if value is not None and str(value).strip() != "":
-            # Ensure values with spaces or special chars are re-quoted
-            if ' ' in value or '"' in value or "'" in value or ',' in value:
-                # Replace internal double quotes with escaped double quotes
-                value_escaped = value.replace('"', '\\"')
-                formatted_attrs.append(f'{key}="{value_escaped}"')
-            else:
-                # For simple values, just quote it
-                formatted_attrs.append(f'{key}="{value}"')
-    return " ".join(formatted_attrs)
+        if value is not None:
+            value = str(value)
+            if value and not value.isspace():
+                # Replace internal double quotes with escaped double quotes (a no-op for simple values)
+                parts += (key, '="', value.replace('"', '\\"'), '" ')
+    if parts:
+        parts[-1] = '"'
+    return ''.join(parts)
 
 def is_gracenote_id(tvg_id):
     """
@@ -63,9 +201,40 @@ def is_gracenote_id(tvg_id):
     """
     if not tvg_id:
         return False
-    
-    gracenote_pattern = re.compile(r"^(EP|MV|SH|GR)\d{8,}(\.[FS]\.EP)?$|^\d{8,}$")
-    return bool(gracenote_pattern.match(tvg_id))
+    # Every match starts with one of the prefixes or a digit; skip the regex for everything else
+    if not (tvg_id.startswith(_GRACENOTE_PREFIXES) or tvg_id[0].isdigit()):
+        return False
+    return _GRACENOTE_RE.match(tvg_id) is not None
+
+def is_tvg_name_potentially_bad(tvg_name):
+    """
+    Checks if an existing tvg-name attribute looks "bad": purely numeric, very long,
+    or containing internal commas/quotes/descriptions.
+    """
+    return (
+        _DIGITS_RE.fullmatch(tvg_name) is not None or # Purely numeric (like "115455")
+        len(tvg_name) > 50 or # Excessively long
+        ',' in tvg_name or # Contains an internal comma
+        '\"' in tvg_name or '\'' in tvg_name or # Contains internal quotes
+        _DOUBLE_DASH_SUFFIX_RE.search(tvg_name) is not None or # Contains common description separator
+        _COLON_SUFFIX_RE.search(tvg_name) is not None or # Contains common description separator
+        _SIMPLE_PAREN_SUFFIX_RE.search(tvg_name) is not None # Contains parentheses (like "(HD)" or "(Description)")
+    )
+
+def _strip_description_suffixes(name):
+    """
+    Removes trailing descriptions (' -- ...', ' - ...', ': ...', '(...)', '[...]') from an
+    already-stripped name. The steps run in order because each can expose text for a later one,
+    but most names contain none of them, so a single fused scan skips the chain entirely.
+    """
+    if _DESCRIPTION_SUFFIX_RE.search(name) is None:
+        return name
+    name = _DOUBLE_DASH_SUFFIX_RE.sub('', name).strip()
+    name = _DASH_SUFFIX_RE.sub('', name).strip()
+    name = _COLON_SUFFIX_RE.sub('', name).strip()
+    name = _PAREN_SUFFIX_RE.sub('', name).strip()
+    name = _BRACKET_SUFFIX_RE.sub('', name).strip()
+    return name
 
 def get_clean_display_name(raw_channel_name_after_comma, attributes):
     """
@@ -75,11 +244,24 @@ def get_clean_display_name(raw_channel_name_after_comma, attributes):
     2. 'tvc-guide-title' attribute from the M3U line's attributes.
     3. Aggressive parsing of the 'raw_channel_name_after_comma' for the primary name.
     """
+    # Only these two attributes affect the result, so they form the cache key with the raw name
+    return _clean_display_name(
+        raw_channel_name_after_comma,
+        attributes.get('tvg-name', ''),
+        attributes.get('tvc-guide-title', '')
+    )
+
+@lru_cache(maxsize=4096)
+def _clean_display_name(raw_channel_name_after_comma, tvg_name, tvc_guide_title):
+    """
+    Memoized implementation of get_clean_display_name(); playlists repeat the same
+    channel names across groups and qualities.
+    """
     # Defensive copy for manipulation
     candidate_from_raw_name = raw_channel_name_after_comma.strip()
 
     # 1. Prioritize and clean 'tvg-name' from the parsed attributes dictionary
-    tvg_name_from_attrs = attributes.get('tvg-name', '').strip()
+    tvg_name_from_attrs = tvg_name.strip()
     if tvg_name_from_attrs:
         # If the extracted tvg_name_from_attrs itself contains an unescaped comma,
         # it means the original M3U was malformed or our attribute regex failed.
@@ -87,15 +269,15 @@ def get_clean_display_name(raw_channel_name_after_comma, attributes):
         if '"' not in tvg_name_from_attrs and "'" not in tvg_name_from_attrs and ',' in tvg_name_from_attrs:
              # Only split if no quotes are within the string, suggesting an unquoted, comma-separated value
             cleaned_tvg_name = tvg_name_from_attrs.split(',', 1)[0].strip()
-            if cleaned_tvg_name and len(cleaned_tvg_name) < 60 and not re.fullmatch(r'\d+', cleaned_tvg_name):
+            if cleaned_tvg_name and len(cleaned_tvg_name) < 60 and not _DIGITS_RE.fullmatch(cleaned_tvg_name):
                 return cleaned_tvg_name
         else:
             # For properly quoted tvg-name or names without internal commas, use directly if reasonable
-            if tvg_name_from_attrs and len(tvg_name_from_attrs) < 60 and not re.fullmatch(r'\d+', tvg_name_from_attrs):
+            if tvg_name_from_attrs and len(tvg_name_from_attrs) < 60 and not _DIGITS_RE.fullmatch(tvg_name_from_attrs):
                 return tvg_name_from_attrs
 
     # 2. Prioritize 'tvc-guide-title' from the parsed attributes dictionary
-    tvc_guide_title = attributes.get('tvc-guide-title', '').strip()
+    tvc_guide_title = tvc_guide_title.strip()
     if tvc_guide_title:
         return tvc_guide_title
 
@@ -103,7 +285,7 @@ def get_clean_display_name(raw_channel_name_after_comma, attributes):
     
     # First, strip leading/trailing quotes from the raw_channel_name_after_comma if present.
     # This helps if the name is like "Channel Name, description" but the whole thing is quoted.
-    candidate_from_raw_name = re.sub(r'^\"|\"$', '', candidate_from_raw_name).strip()
+    candidate_from_raw_name = _SURROUNDING_QUOTE_RE.sub('', candidate_from_raw_name).strip()
 
     # Try to find the *first* clean segment that looks like a name.
     # This specifically targets cases like "Channel Name, Description Text" or "Channel Name" (Description)
@@ -113,161 +295,232 @@ def get_clean_display_name(raw_channel_name_after_comma, attributes):
         # Ensure it's not empty and doesn't look like an attribute (e.g., "http://...")
         if potential_name and len(potential_name) > 2 and not potential_name.startswith('http'):
             # Aggressively clean this potential name from trailing descriptions/brackets
-            potential_name = re.sub(r'\s+--\s+.*$', '', potential_name).strip()
-            potential_name = re.sub(r'\s+-\s+.*$', '', potential_name).strip()
-            potential_name = re.sub(r'\s*:\s+.*$', '', potential_name).strip()
-            potential_name = re.sub(r'\s*\(.*\)$', '', potential_name).strip()
-            potential_name = re.sub(r'\s*\[.*\]$', '', potential_name).strip()
-            potential_name = re.sub(r'[\"\']', '', potential_name).strip() # Remove any leftover quotes
+            potential_name = _strip_description_suffixes(potential_name)
+            potential_name = potential_name.translate(_QUOTE_TABLE).strip() # Remove any leftover quotes
 
             if potential_name:
                 return potential_name
 
     # Ultimate Fallback: Aggressive cleaning and truncation of the entire raw_channel_name_after_comma
     # (after attempts to split by comma have failed to yield a good name, or no comma was present)
-    cleaned_name = re.sub(r'[\"\']', '', candidate_from_raw_name).strip() 
-    cleaned_name = re.sub(r'\s+--\s+.*$', '', cleaned_name).strip()
-    cleaned_name = re.sub(r'\s+-\s+.*$', '', cleaned_name).strip()
-    cleaned_name = re.sub(r'\s*:\s+.*$', '', cleaned_name).strip()
-    cleaned_name = re.sub(r'\s*\(.*\)$', '', cleaned_name).strip()
-    cleaned_name = re.sub(r'\s*\[.*\]$', '', cleaned_name).strip()
-    cleaned_name = re.sub(r'\s+(HD|SD|Live|TV|Channel|Show|Movie|Series|Now)\s*$', '', cleaned_name, flags=re.IGNORECASE).strip()
+    cleaned_name = candidate_from_raw_name.translate(_QUOTE_TABLE).strip() 
+    cleaned_name = _strip_description_suffixes(cleaned_name)
+    cleaned_name = _QUALITY_SUFFIX_RE.sub('', cleaned_name).strip()
 
     if len(cleaned_name) > 50:
         cleaned_name = cleaned_name[:47].strip() + '...'
 
-    cleaned_name = re.sub(r'[^\w\s.,&+\-:]', '', cleaned_name).strip() 
+    cleaned_name = _DISPLAY_NAME_DISALLOWED_RE.sub('', cleaned_name).strip() 
 
     return cleaned_name if cleaned_name else "Unknown Channel"
 
 def check_m3u(file_content, mode='advanced'):
     """
     Parses M3U content, identifies errors/warnings, and suggests automated fixes based on mode.
+    file_content may be the whole playlist as a string, or any iterable of lines (e.g. an open
+    text file), which is consumed in a single forward pass.
     Mode: 'basic' for essential checks, 'advanced' for comprehensive checks.
     Returns (list_of_errors, list_of_channels, list_of_fix_suggestions).
     """
     errors = []
+    # The mode is fixed for the whole run, so resolve it once instead of comparing strings per channel
+    advanced = mode == 'advanced'
     channels = []
+    raw_lines = file_content.splitlines() if isinstance(file_content, str) else file_content
     fix_suggestions = []
-    lines = file_content.splitlines()
+    # Bind the hot-path callables to locals once instead of looking them up on every line
+    add_error = errors.append
+    add_fix = fix_suggestions.append
+    find_attributes = _ATTR_RE.findall
+    intern = sys.intern
+    # Strip every line exactly once; the parser below is a single forward pass over them,
+    # so the stripped lines are produced lazily rather than as a second list.
+    lines = map(str.strip, raw_lines)
     
-    i = 0
     channel_count = 0
-    tvg_id_map = {}
-    channel_name_map = {}
+    # Line numbers seen so far per tvg-id / channel name; missing keys start as an empty list
+    tvg_id_map = defaultdict(list)
+    channel_name_map = defaultdict(list)
+
+    # The EXTINF entry still waiting for its stream URL:
+    # (line_num, channel_name, tvg_id, tvg_name, tvg_logo, group_title), with any fixes applied.
+    pending = None
+
+    def finish_pending_channel(stream_url, stream_url_found_at_line):
+        extinf_line_num, raw_channel_name_after_comma, tvg_id, tvg_name, tvg_logo, group_title = pending
+
+        # Stream URL check is always critical, regardless of mode
+        if stream_url:
+            if stream_url_found_at_line != extinf_line_num + 1:
+                add_fix({
+                    'type': 'reorder_stream_url',
+                    'line_num': extinf_line_num,
+                    'original_stream_line_num': stream_url_found_at_line,
+                    'stream_url': stream_url,
+                    'channel_name': raw_channel_name_after_comma
+                })
+                add_error(f"M3U Error: Stream URL for channel '{raw_channel_name_after_comma}' (Line {extinf_line_num}) was not immediately after EXTINF line. Found at Line {stream_url_found_at_line}. Suggesting fix: Reorder URL.")
+        else:
+            add_error(f"M3U Error: Missing stream URL after EXTINF line for channel '{raw_channel_name_after_comma}' (Line {extinf_line_num}). Each #EXTINF must be immediately followed by a stream URL.")
+
+        # This is a suggestion, only include in advanced mode
+        if advanced and stream_url:
+            stream_url_lower = stream_url.lower()
+            if not (stream_url_lower.endswith('.m3u8') or '.ts' in stream_url_lower or '/hls/' in stream_url_lower):
+                add_error(f"M3U Channels DVR Suggestion: Stream URL for '{raw_channel_name_after_comma}' (Line {extinf_line_num}) might not be HLS (.m3u8) or MPEG-TS (.ts). Channels DVR generally prefers HLS or raw MPEG-TS streams.")
+
+        # Group titles are low-cardinality and shared across channels; long ones are left alone
+        # like any other arbitrary input.
+        if len(group_title) < _INTERN_MAX_LEN:
+            group_title = intern(group_title)
+        channels.append(Channel(
+            name=raw_channel_name_after_comma, # This remains the original full name for record keeping
+            tvg_id=tvg_id,
+            tvg_name=tvg_name, # This will be the cleaned name
+            tvg_logo=tvg_logo,
+            group_title=group_title,
+            stream_url=stream_url
+        ))
+
+    for line_num_display, line in enumerate(lines, 1):
+
+        if pending is not None:
+            # Waiting for a stream URL: skip blank lines and comments/options in between,
+            # stop at the next entry or header, and take the first plain line as the URL.
+            if not line:
+                continue
+            if line.startswith(('#EXTINF:', '#EXTM3U')):
+                finish_pending_channel("", -1)
+                pending = None
+            elif line.startswith('#'):
+                continue
+            else:
+                finish_pending_channel(line, line_num_display)
+                pending = None
+                continue
 
-    while i < len(lines):
-        line_num_display = i + 1
-        line = lines[i].strip()
-        
-        # Skip empty lines, but only if they are not expected to be a stream URL.
-        if not line and not (i > 0 and lines[i-1].strip().startswith('#EXTINF:')):
-            i += 1
+        if not line:
             continue
 
         if line.startswith('#EXTINF:'):
             channel_count += 1
             
-            # --- REVERTED TO A MORE ROBUST REGEX FOR EXTINF LINE PARSING ---
-            # This regex splits the line into duration, attributes string, and raw channel name
-            # by looking for the FIRST comma after the duration and attributes.
-            # This is generally more stable for common M3U variations.
-            # `(-?\d+)`: Duration (group 1)
-            # `\s*`: Optional whitespace
-            # `([^,]*?)`: Non-greedy match for attributes (group 2). This captures up to the FIRST comma.
-            # `,`: The comma separator
-            # `(.*)`: The rest of the line as raw_channel_name (group 3)
+            # Split the line into duration, attributes string, and raw channel name using plain
+            # string operations (no regex engine on the hot path):
+            # `#EXTINF:<duration>[ attributes],<channel name>`
+            # - The FIRST comma separates duration+attributes from the raw channel name.
+            # - The duration is an optional '-' followed by digits; whatever follows is the attributes string.
             # NOTE: If an attribute VALUE itself contains an unescaped comma before the "real" channel name comma,
-            # this regex will incorrectly split `attributes_str`. This is a common M3U parsing challenge.
-            # However, it's more stable than the previous complex regex for the overall line structure.
-            match = re.search(r'#EXTINF:(-?\d+)\s*([^,]*),(.*)', line)
+            # this will incorrectly split `attributes_str`. This is a common M3U parsing challenge.
+            # However, it's stable for the overall line structure of common M3U variations.
+            head, comma, raw_channel_name_after_comma = line[8:].partition(',')
+            duration_digits = head[1:] if head.startswith('-') else head
+            attributes_str = duration_digits.lstrip('0123456789')
             
-            if not match:
-                errors.append(f"M3U Error: Malformed EXTINF line (Line {line_num_display}): {line}. Expected '#EXTINF:<duration> [attributes],<channel name>'")
-                i += 1
+            if not comma or len(attributes_str) == len(duration_digits):
+                add_error(f"M3U Error: Malformed EXTINF line (Line {line_num_display}): {line}. Expected '#EXTINF:<duration> [attributes],<channel name>'")
                 continue
 
-            duration = match.group(1)
-            attributes_str = match.group(2).strip() # The string containing all attributes
-            raw_channel_name_after_comma = match.group(3).strip() # The full raw channel name AFTER the last comma
+            duration = head[:len(head) - len(attributes_str)]
+            attributes_str = attributes_str.strip() # The string containing all attributes
+            raw_channel_name_after_comma = raw_channel_name_after_comma.strip() # The full raw channel name AFTER the first comma
+            # Channel names repeat heavily (HD/SD variants, re-runs); interning shares one object
+            # and its cached hash across channel_name_map lookups and the records built below.
+            # Arbitrarily long names (usually descriptions) are left alone to bound the intern table.
+            if len(raw_channel_name_after_comma) < _INTERN_MAX_LEN:
+                raw_channel_name_after_comma = intern(raw_channel_name_after_comma)
 
             if not raw_channel_name_after_comma:
-                errors.append(f"M3U Error: Channel name missing in EXTINF line (Line {line_num_display}): {line}")
+                add_error(f"M3U Error: Channel name missing in EXTINF line (Line {line_num_display}): {line}")
 
             attributes = {}
             # This part correctly parses key="value" pairs from the isolated attributes_str
             # It's robust to spaces within quoted values.
-            for attr_match in re.finditer(r'(\S+)="([^"]*)"', attributes_str):
-                attributes[attr_match.group(1).lower()] = attr_match.group(2)
-
-            current_line_attributes = attributes.copy()
+            for attr_key, attr_value in find_attributes(attributes_str):
+                # Keys are almost always lowercase already; only case-fold (and allocate) when needed.
+                if not attr_key.islower():
+                    attr_key = attr_key.lower()
+                # Attribute keys come from a tiny vocabulary, so intern them to share one copy each
+                if len(attr_key) < _INTERN_MAX_LEN:
+                    attr_key = intern(attr_key)
+                # Values are stripped once here, so nothing downstream needs to strip them again
+                attributes[attr_key] = attr_value.strip()
+
+            # The attributes dict is fresh per line, so fixes are applied to it directly.
+            current_line_attributes = attributes
             modified_attributes_for_fix = False
 
-            tvg_id = attributes.get('tvg-id', '').strip()
-            tvg_name_from_attrs = attributes.get('tvg-name', '').strip() # Get current tvg-name attribute value
-            group_title = attributes.get('group-title', '').strip()
-
-            # Determine the suggested_display_name using the new logic.
-            # Pass the raw_channel_name_after_comma (the text after the last comma)
-            # and the fully parsed attributes for the best possible name extraction.
-            suggested_display_name = get_clean_display_name(raw_channel_name_after_comma, attributes)
-
-            # --- Basic Mode Checks & Fixes ---
-            # Basic mode focuses ONLY on tvg-id and stream URL pairing.
-            # It does not suggest tvg-name or group-title fixes.
-
-            # Suggestion 1: Missing tvg-id (REQUIRED in basic mode for guide data)
-            if not tvg_id:
-                suggested_tvg_id = sanitize_channel_name_for_id(suggested_display_name)
-                if suggested_tvg_id:
-                    current_line_attributes['tvg-id'] = suggested_tvg_id
-                    modified_attributes_for_fix = True
-                    errors.append(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-id'. This is crucial for EPG matching in Channels DVR. Suggesting fix: Add tvg-id='{suggested_tvg_id}'.")
-                else:
-                    errors.append(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-id'. (Cannot auto-suggest a fix for this name).")
-            
-            # --- Advanced Mode Specific Checks & Fixes ---
-            if mode == 'advanced':
-                # Suggestion 2: Missing or incorrect tvg-name
-                # Conditions for suggesting a tvg-name fix:
-                # 1. tvg-name attribute is completely missing (empty string).
-                # OR
-                # 2. tvg-name attribute exists, but its value is different from our suggested_display_name,
-                #    AND our suggested_display_name is valid (not "Unknown Channel"),
-                #    AND the existing tvg-name attribute looks "bad" (e.g., purely numeric, very long, contains internal commas/quotes/descriptions).
-                
-                is_existing_tvg_name_potentially_bad = (
-                    re.fullmatch(r'\d+', tvg_name_from_attrs) is not None or # Purely numeric (like "115455")
-                    len(tvg_name_from_attrs) > 50 or # Excessively long
-                    ',' in tvg_name_from_attrs or # Contains an internal comma
-                    '\"' in tvg_name_from_attrs or '\'' in tvg_name_from_attrs or # Contains internal quotes
-                    re.search(r'\s+--\s+.*$', tvg_name_from_attrs) is not None or # Contains common description separator
-                    re.search(r'\s*:\s+.*$', tvg_name_from_attrs) is not None or # Contains common description separator
-                    re.search(r'\s*\([^\)]*\)$', tvg_name_from_attrs) is not None # Contains parentheses (like "(HD)" or "(Description)")
+            tvg_id = attributes.get('tvg-id', '')
+            tvg_name_from_attrs = attributes.get('tvg-name', '') # Get current tvg-name attribute value
+            group_title = attributes.get('group-title', '')
+            tvg_name = tvg_name_from_attrs # Value for the channel record; replaced if a fix is suggested
+
+            # Fast path: skip name suggestion entirely when nothing can be fixed for this entry.
+            # A present tvg-id settles basic mode; advanced mode also needs a group-title and a
+            # tvg-name that get_clean_display_name would return unchanged (under 60 characters,
+            # not all digits, no unquoted comma), as only then can no tvg-name fix be suggested.
+            # These checks are cheaper than the suggestion itself; the unclean-name heuristic
+            # only runs below, once the suggestion differs. This is the common case for
+            # well-formed playlists.
+            needs_suggestions = not tvg_id or (
+                advanced and (
+                    not tvg_name_from_attrs or
+                    not group_title or
+                    len(tvg_name_from_attrs) >= 60 or
+                    tvg_name_from_attrs.isdecimal() or # Same test as _DIGITS_RE.fullmatch()
+                    (',' in tvg_name_from_attrs and '"' not in tvg_name_from_attrs and "'" not in tvg_name_from_attrs)
                 )
-
-                if not tvg_name_from_attrs or \
-                   (tvg_name_from_attrs != suggested_display_name and 
-                    suggested_display_name != "Unknown Channel" and 
-                    is_existing_tvg_name_potentially_bad):
-                    
-                    current_line_attributes['tvg-name'] = suggested_display_name
-                    modified_attributes_for_fix = True
-                    if not tvg_name_from_attrs:
-                         errors.append(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-name'. Channels DVR often uses this for display. Suggesting fix: Add tvg-name='{suggested_display_name}'.")
+            )
+
+            if needs_suggestions:
+                # Determine the suggested_display_name using the new logic.
+                # Pass the raw_channel_name_after_comma (the text after the last comma)
+                # and the fully parsed attributes for the best possible name extraction.
+                suggested_display_name = get_clean_display_name(raw_channel_name_after_comma, attributes)
+
+                # --- Basic Mode Checks & Fixes ---
+                # Basic mode focuses ONLY on tvg-id and stream URL pairing.
+                # It does not suggest tvg-name or group-title fixes.
+
+                # Suggestion 1: Missing tvg-id (REQUIRED in basic mode for guide data)
+                if not tvg_id:
+                    suggested_tvg_id = sanitize_channel_name_for_id(suggested_display_name)
+                    if suggested_tvg_id:
+                        current_line_attributes['tvg-id'] = tvg_id = suggested_tvg_id
+                        modified_attributes_for_fix = True
+                        add_error(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-id'. This is crucial for EPG matching in Channels DVR. Suggesting fix: Add tvg-id='{suggested_tvg_id}'.")
                     else:
-                         errors.append(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) has an unclean 'tvg-name' attribute ('{tvg_name_from_attrs}'). Suggesting fix: Change tvg-name to '{suggested_display_name}'.")
-
-                # Suggestion 3: Missing group-title
-                if not group_title:
-                    suggested_group_title = "Unsorted"
-                    current_line_attributes['group-title'] = suggested_group_title
-                    modified_attributes_for_fix = True
-                    errors.append(f"M3U Channels DVR Suggestion: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'group-title'. Adding one helps organize channels in Channels DVR. Suggesting fix: Add group-title='{suggested_group_title}'.")
+                        add_error(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-id'. (Cannot auto-suggest a fix for this name).")
+            
+                # --- Advanced Mode Specific Checks & Fixes ---
+                if advanced:
+                    # Suggestion 2: Missing or incorrect tvg-name
+                    # Conditions for suggesting a tvg-name fix:
+                    # 1. tvg-name attribute is completely missing (empty string).
+                    # OR
+                    # 2. tvg-name attribute exists, but its value is different from our suggested_display_name,
+                    #    AND our suggested_display_name is valid (not "Unknown Channel"),
+                    #    AND the existing tvg-name attribute looks "bad" (checked last, as it is the expensive part).
+                    if not tvg_name_from_attrs:
+                        current_line_attributes['tvg-name'] = tvg_name = suggested_display_name
+                        modified_attributes_for_fix = True
+                        add_error(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'tvg-name'. Channels DVR often uses this for display. Suggesting fix: Add tvg-name='{suggested_display_name}'.")
+                    elif tvg_name_from_attrs != suggested_display_name and suggested_display_name != "Unknown Channel":
+                        if is_tvg_name_potentially_bad(tvg_name_from_attrs):
+                            current_line_attributes['tvg-name'] = tvg_name = suggested_display_name
+                            modified_attributes_for_fix = True
+                            add_error(f"M3U Channels DVR Warning: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) has an unclean 'tvg-name' attribute ('{tvg_name_from_attrs}'). Suggesting fix: Change tvg-name to '{suggested_display_name}'.")
+
+                    # Suggestion 3: Missing group-title
+                    if not group_title:
+                        suggested_group_title = "Unsorted"
+                        current_line_attributes['group-title'] = group_title = suggested_group_title
+                        modified_attributes_for_fix = True
+                        add_error(f"M3U Channels DVR Suggestion: Channel '{raw_channel_name_after_comma}' (Line {line_num_display}) is missing 'group-title'. Adding one helps organize channels in Channels DVR. Suggesting fix: Add group-title='{suggested_group_title}'.")
 
             # Add a single 'rebuild_extinf_attributes' fix if any attributes were modified in current mode
             if modified_attributes_for_fix:
-                fix_suggestions.append({
+                add_fix({
                     'type': 'rebuild_extinf_attributes',
                     'line_num': line_num_display,
                     'duration': duration,
@@ -275,266 +528,333 @@ def check_m3u(file_content, mode='advanced'):
                     'final_attributes': current_line_attributes
                 })
             
-            current_tvg_id_for_checks = current_line_attributes.get('tvg-id', '').strip()
-
-            if current_tvg_id_for_checks:
-                if current_tvg_id_for_checks in tvg_id_map: # Fixed typo: changed tvg_for_checks to current_tvg_id_for_checks
-                    errors.append(f"M3U Channels DVR Warning: Duplicate 'tvg-id' '{current_tvg_id_for_checks}' found for channel '{raw_channel_name_after_comma}' (Line {line_num_display}). Previous at line(s): {', '.join(map(str, tvg_id_map[current_tvg_id_for_checks]))}. Channels DVR may only import one instance.")
-                    tvg_id_map[current_tvg_id_for_checks].append(line_num_display)
-                else:
-                    tvg_id_map[current_tvg_id_for_checks] = [line_num_display]
+            # tvg_id already holds the stripped value, or the suggested one if a fix replaced it.
+            if tvg_id:
+                if len(tvg_id) < _INTERN_MAX_LEN:
+                    tvg_id = intern(tvg_id) # Shared by tvg_id_map and the channel record
+                previous_lines = tvg_id_map[tvg_id]
+                if previous_lines:
+                    add_error(f"M3U Channels DVR Warning: Duplicate 'tvg-id' '{tvg_id}' found for channel '{raw_channel_name_after_comma}' (Line {line_num_display}). Previous at line(s): {', '.join(map(str, previous_lines))}. Channels DVR may only import one instance.")
+                previous_lines.append(line_num_display)
 
             if raw_channel_name_after_comma:
-                if raw_channel_name_after_comma in channel_name_map:
-                    errors.append(f"M3U Warning: Duplicate channel name '{raw_channel_name_after_comma}' found (Line {line_num_display}). Previous at line(s): {', '.join(map(str, channel_name_map[raw_channel_name_after_comma]))}. This might cause confusion.")
-                    channel_name_map[raw_channel_name_after_comma].append(line_num_display)
-                else:
-                    channel_name_map[raw_channel_name_after_comma] = [line_num_display]
+                previous_lines = channel_name_map[raw_channel_name_after_comma]
+                if previous_lines:
+                    add_error(f"M3U Warning: Duplicate channel name '{raw_channel_name_after_comma}' found (Line {line_num_display}). Previous at line(s): {', '.join(map(str, previous_lines))}. This might cause confusion.")
+                previous_lines.append(line_num_display)
 
-            stream_url = ""
-            stream_url_found_at_line = -1
-            
-            for j in range(i + 1, len(lines)):
-                temp_line = lines[j].strip()
-                if not temp_line:
-                    continue
-                if temp_line.startswith('#EXTINF:') or temp_line.startswith('#EXTM3U'):
-                    break
-                if not temp_line.startswith('#'):
-                    stream_url = temp_line
-                    stream_url_found_at_line = j + 1
-                    break
-            
-            # Stream URL check is always critical, regardless of mode
-            if stream_url:
-                if stream_url_found_at_line != (i + 2): 
-                    fix_suggestions.append({
-                        'type': 'reorder_stream_url',
-                        'line_num': line_num_display,
-                        'original_stream_line_num': stream_url_found_at_line,
-                        'stream_url': stream_url,
-                        'channel_name': raw_channel_name_after_comma
-                    })
-                    errors.append(f"M3U Error: Stream URL for channel '{raw_channel_name_after_comma}' (Line {line_num_display}) was not immediately after EXTINF line. Found at Line {stream_url_found_at_line}. Suggesting fix: Reorder URL.")
-                
-                i = stream_url_found_at_line - 1
-            else:
-                errors.append(f"M3U Error: Missing stream URL after EXTINF line for channel '{raw_channel_name_after_comma}' (Line {line_num_display}). Each #EXTINF must be immediately followed by a stream URL.")
-                i += 1
-            
-            # This is a suggestion, only include in advanced mode
-            if mode == 'advanced' and stream_url and not (stream_url.lower().endswith('.m3u8') or '.ts' in stream_url.lower() or '/hls/' in stream_url.lower()):
-                errors.append(f"M3U Channels DVR Suggestion: Stream URL for '{raw_channel_name_after_comma}' (Line {line_num_display}) might not be HLS (.m3u8) or MPEG-TS (.ts). Channels DVR generally prefers HLS or raw MPEG-TS streams.")
-            
-            channels.append({
-                'name': raw_channel_name_after_comma, # This remains the original full name for record keeping
-                'tvg_id': current_line_attributes.get('tvg-id', ''),
-                'tvg_name': current_line_attributes.get('tvg-name', ''), # This will be the cleaned name
-                'tvg_logo': current_line_attributes.get('tvg-logo', attributes.get('tvg-logo', '').strip()),
-                'group_title': current_line_attributes.get('group-title', ''),
-                'stream_url': stream_url
-            })
+            pending = (line_num_display, raw_channel_name_after_comma, tvg_id, tvg_name,
+                       attributes.get('tvg-logo', ''), group_title)
 
         elif line.startswith('#EXTVLCOPT:'):
             pass # Explicitly ignore VLC options
         
         elif not line.startswith('#EXTM3U'):
-            errors.append(f"M3U Warning: Unexpected line (might be ignored) (Line {line_num_display}): {line}")
-        
-        i += 1
+            add_error(f"M3U Warning: Unexpected line (might be ignored) (Line {line_num_display}): {line}")
+
+    if pending is not None:
+        finish_pending_channel("", -1)
     
     # Channel count warning applies to both modes as it's a Channels DVR performance consideration
     if channel_count > 750:
-        errors.append(f"M3U Channels DVR Warning: Detected {channel_count} channels. Channels DVR might experience performance issues or limits with more than ~750 channels per M3U playlist.")
+        add_error(f"M3U Channels DVR Warning: Detected {channel_count} channels. Channels DVR might experience performance issues or limits with more than ~750 channels per M3U playlist.")
 
     return errors, channels, fix_suggestions
 
+def _rebuild_extinf_line(fix):
+    """
+    Returns the EXTINF line for a 'rebuild_extinf_attributes' fix, including its newline.
+    """
+    duration = fix['duration']
+    channel_name_after_comma = fix['channel_name'] # This is the original raw channel name AFTER the last comma
+    final_attributes = fix['final_attributes']
+
+    new_attributes_str = format_attributes_for_extinf(final_attributes)
+    # Reconstruct the line: #EXTINF:duration attributes,channel_name_after_comma
+    return f'#EXTINF:{duration} {new_attributes_str},{channel_name_after_comma}\n'
+
 def apply_m3u_fixes(original_content, fix_suggestions):
     """
     Applies a list of fix suggestions to the original M3U content to generate a fixed version.
-    Fixes are applied in reverse order of line number to prevent index shifting issues.
+    Each fix becomes a (start_offset, end_offset, replacement) edit against the original content,
+    and the output is assembled in a single forward pass.
+    When no stream URL is reordered, every fix replaces a single line in place, so the lines
+    are simply replaced in a list instead.
     """
-    fixed_lines_array = original_content.splitlines(keepends=True) 
-    fix_suggestions_sorted = sorted(fix_suggestions, key=lambda x: x['line_num'], reverse=True)
-
-    for fix in fix_suggestions_sorted:
+    if all(fix['type'] != 'reorder_stream_url' for fix in fix_suggestions):
+        fixed_lines_array = original_content.splitlines(keepends=True)
+        for fix in fix_suggestions:
+            line_idx = fix['line_num'] - 1
+            if line_idx < 0 or line_idx >= len(fixed_lines_array):
+                print(f"Warning: Attempted to apply fix at invalid line index {line_idx}. Skipping fix: {fix}")
+                continue
+            if fix['type'] == 'rebuild_extinf_attributes':
+                fixed_lines_array[line_idx] = _rebuild_extinf_line(fix)
+        return "".join(fixed_lines_array)
+
+    # Offset of the start of every line, plus the end of the content, using the same
+    # line boundaries as str.splitlines() so line numbers match check_m3u.
+    line_offsets = [0]
+    line_offsets.extend(m.end() for m in _LINE_BREAK_RE.finditer(original_content))
+    if line_offsets[-1] != len(original_content):
+        line_offsets.append(len(original_content))
+    line_count = len(line_offsets) - 1
+
+    def line_text(idx):
+        return original_content[line_offsets[idx]:line_offsets[idx + 1]]
+
+    edits = []
+    for fix in fix_suggestions:
         fix_type = fix['type']
         line_idx = fix['line_num'] - 1
 
-        if line_idx < 0 or line_idx >= len(fixed_lines_array):
+        if line_idx < 0 or line_idx >= line_count:
             print(f"Warning: Attempted to apply fix at invalid line index {line_idx}. Skipping fix: {fix}")
             continue
 
         if fix_type == 'rebuild_extinf_attributes':
-            duration = fix['duration']
-            channel_name_after_comma = fix['channel_name'] # This is the original raw channel name AFTER the last comma
-            final_attributes = fix['final_attributes']
-
-            new_attributes_str = format_attributes_for_extinf(final_attributes)
-            # Reconstruct the line: #EXTINF:duration attributes,channel_name_after_comma
-            new_extinf_line_content = f'#EXTINF:{duration} {new_attributes_str},{channel_name_after_comma}'
-            fixed_lines_array[line_idx] = new_extinf_line_content + "\n"
+            edits.append((line_offsets[line_idx], line_offsets[line_idx + 1], _rebuild_extinf_line(fix)))
             
         elif fix_type == 'reorder_stream_url':
             extinf_line_idx = fix['line_num'] - 1
             original_stream_line_idx = fix['original_stream_line_num'] - 1
             stream_url = fix['stream_url']
 
-            line_after_extinf = fixed_lines_array[extinf_line_idx + 1].strip() if (extinf_line_idx + 1) < len(fixed_lines_array) else ""
+            line_after_extinf = line_text(extinf_line_idx + 1).strip() if (extinf_line_idx + 1) < line_count else ""
             if line_after_extinf == stream_url.strip():
                 continue
 
-            if original_stream_line_idx < len(fixed_lines_array) and \
-               fixed_lines_array[original_stream_line_idx].strip() == stream_url.strip():
-                del fixed_lines_array[original_stream_line_idx]
+            if original_stream_line_idx < line_count and \
+               line_text(original_stream_line_idx).strip() == stream_url.strip():
+                edits.append((line_offsets[original_stream_line_idx], line_offsets[original_stream_line_idx + 1], ""))
             else:
                 print(f"Warning: Stream URL for channel '{fix['channel_name']}' not found at expected original line {fix['original_stream_line_num']} during reorder fix. Attempting to insert only.")
 
-            fixed_lines_array.insert(extinf_line_idx + 1, stream_url + "\n")
+            insert_at = line_offsets[extinf_line_idx + 1]
+            edits.append((insert_at, insert_at, stream_url + "\n"))
+
+    # Sorting by (start, end) keeps an EXTINF rebuild ahead of the URL inserted right after it.
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
 
-    return "".join(fixed_lines_array)
+    output = io.StringIO()
+    prev_end = 0
+    for edit_start, edit_end, replacement in edits:
+        output.write(original_content[prev_end:edit_start])
+        output.write(replacement)
+        prev_end = edit_end
+    output.write(original_content[prev_end:])
+
+    return output.getvalue()
 
 def parse_xmltv_datetime(dt_str):
-    """Parses XMLTV datetime string (YYYYMMDDHHMMSS +/-ZZZZ) into datetime object."""
-    try:
-        match = re.match(r'(\d{14})\s*([+-]\d{4})?', dt_str)
-        if match:
-            dt_part = match.group(1)
-            dt_obj = datetime.strptime(dt_part, '%Y%m%d%H%M%S')
-            return dt_obj
+    """
+    Parses XMLTV datetime string (YYYYMMDDHHMMSS +/-ZZZZ) into datetime object.
+    """
+    # Only the leading 14 digits matter; the timezone offset is not used.
+    dt_part = dt_str[:14]
+    if len(dt_part) < 14 or not (dt_part.isascii() and dt_part.isdigit()):
         return None
+    return _parse_xmltv_digits(dt_part)
+
+@lru_cache(maxsize=1 << 16)
+def _parse_xmltv_digits(dt_part):
+    """
+    Memoized datetime construction for exactly 14 ASCII digits, as many programmes share the
+    same start/stop timestamps. Keyed on the digits alone, so differing offsets or trailing
+    text still hit the cache and every cached key stays 14 characters long.
+    """
+    try:
+        # Direct slicing is equivalent to strptime('%Y%m%d%H%M%S') for exactly 14 digits, and much cheaper
+        return datetime(int(dt_part[0:4]), int(dt_part[4:6]), int(dt_part[6:8]),
+                        int(dt_part[8:10]), int(dt_part[10:12]), int(dt_part[12:14]))
     except ValueError:
         return None
 
 def check_epg(file_content):
     """
     Parses EPG XMLTV content and identifies errors/warnings.
+    Accepts either a string or raw bytes (bytes are handed to lxml without decoding).
+    If lxml rejects the bytes for invalid character encoding, they are decoded as UTF-8 with the
+    invalid bytes dropped and checked again, with a warning added to the errors.
+    If the document is not well-formed XML, only the syntax error is returned.
     Returns (list_of_errors, dict_of_channels, list_of_programs).
     """
     errors = []
     channels = {}
-    programs_by_channel = {}
+    # (start_dt, document_position, stop_dt, Program) per channel, only for programs with valid times;
+    # feeds the overlap check. The position keeps equal start times in document order when sorted.
+    timed_programs_by_channel = {}
+    program_position = 0
     all_program_data = []
 
+    # Programs whose channel has not been declared (yet); resolved once the whole file is read.
+    orphan_programs = []
+
     try:
-        root = etree.fromstring(file_content.encode('utf-8'))
-        if root.tag != 'tv':
-            errors.append("EPG Error: Root element is not 'tv'. Expected '<tv>' tag.")
+        # Stream the document instead of building the full tree: only <channel> and <programme>
+        # elements are delivered, and each one is freed as soon as it has been checked.
+        xml_bytes = file_content if isinstance(file_content, bytes) else file_content.encode('utf-8')
+        context = etree.iterparse(io.BytesIO(xml_bytes), events=('end',), tag=('channel', 'programme'))
 
         epg_channel_ids = set()
-        for channel_element in root.findall('channel'):
-            channel_id = channel_element.get('id')
-            if not channel_id:
-                errors.append("EPG Error: Channel element missing 'id' attribute.")
-                continue
+        for _, element in context:
+            parent = element.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue # Only direct children of the root element are channels/programmes
+
+            if element.tag == 'channel':
+                channel_element = element
+                channel_id = channel_element.get('id')
+                if not channel_id:
+                    errors.append("EPG Error: Channel element missing 'id' attribute.")
+                else:
+                    if channel_id in epg_channel_ids:
+                        errors.append(f"EPG Error: Duplicate 'channel id' '{channel_id}' found in EPG file. Each channel must have a unique ID.")
+                    epg_channel_ids.add(channel_id)
+
+                    display_names = channel_element.findall('display-name')
+                    if not display_names:
+                        errors.append(f"EPG Channels DVR Warning: Channel '{channel_id}' missing 'display-name'.")
+                    
+                    icon_element = channel_element.find('icon')
+                    channels[channel_id] = {
+                        'display_names': [name.text for name in display_names if name.text],
+                        'icon': icon_element.get('src') if icon_element is not None else None
+                    }
+                    timed_programs_by_channel.setdefault(channel_id, [])
 
-            if channel_id in epg_channel_ids:
-                errors.append(f"EPG Error: Duplicate 'channel id' '{channel_id}' found in EPG file. Each channel must have a unique ID.")
-            epg_channel_ids.add(channel_id)
+            else:
+                program_element = element
+                # Read all attributes through one attrib proxy
+                program_attrib = program_element.attrib
+                channel_id = program_attrib.get('channel')
+                start_time_str = program_attrib.get('start')
+                stop_time_str = program_attrib.get('stop')
+
+                # Bucket the children by tag in a single pass instead of one findall() walk per tag
+                title_elements = []
+                description_elements = []
+                category_elements = []
+                episode_num_elements = []
+                for child in program_element:
+                    child_tag = child.tag
+                    if child_tag == 'title':
+                        title_elements.append(child)
+                    elif child_tag == 'desc':
+                        description_elements.append(child)
+                    elif child_tag == 'category':
+                        category_elements.append(child)
+                    elif child_tag == 'episode-num':
+                        episode_num_elements.append(child)
+
+                title_element = title_elements[0] if title_elements else None
+                program_title = title_element.text if title_element is not None and title_element.text else 'Unknown Title'
+
+                program_errors_local = []
+
+                if not channel_id:
+                    program_errors_local.append("Program element missing 'channel' attribute.")
+                
+                start_dt, stop_dt = None, None
+                if not start_time_str:
+                    program_errors_local.append("Missing 'start' time.")
+                else:
+                    start_dt = parse_xmltv_datetime(start_time_str)
+                    if start_dt is None:
+                        program_errors_local.append(f"Invalid 'start' time format: '{start_time_str}'.")
 
-            display_names = channel_element.findall('display-name')
-            if not display_names:
-                errors.append(f"EPG Channels DVR Warning: Channel '{channel_id}' missing 'display-name'.")
-            
-            channels[channel_id] = {
-                'display_names': [name.text for name in display_names if name.text],
-                'icon': channel_element.find('icon').get('src') if channel_element.find('icon') is not None else None
-            }
-            programs_by_channel[channel_id] = []
+                if not stop_time_str:
+                    program_errors_local.append("Missing 'stop' time.")
+                else:
+                    stop_dt = parse_xmltv_datetime(stop_time_str)
+                    if stop_dt is None:
+                        program_errors_local.append(f"Invalid 'stop' time format: '{stop_time_str}'.")
 
-        for program_element in root.findall('programme'):
-            channel_id = program_element.get('channel')
-            start_time_str = program_element.get('start')
-            stop_time_str = program_element.get('stop')
+                if start_dt and stop_dt and start_dt >= stop_dt:
+                     program_errors_local.append(f"Start time ({start_time_str}) is equal to or after stop time ({stop_time_str}).")
 
-            title_element = program_element.find('title')
-            program_title = title_element.text if title_element is not None and title_element.text else 'Unknown Title'
+                if not any(t.text for t in title_elements):
+                    program_errors_local.append("Missing 'title'. Essential for guide display.")
+                
+                if not any(d.text for d in description_elements):
+                    program_errors_local.append("Suggestion: Missing 'desc' (description).")
 
-            program_errors_local = []
+                is_movie = any(c.text and c.text.lower() == 'movie' for c in category_elements)
 
-            if not channel_id:
-                program_errors_local.append("Program element missing 'channel' attribute.")
-            
-            start_dt, stop_dt = None, None
-            if not start_time_str:
-                program_errors_local.append("Missing 'start' time.")
-            else:
-                start_dt = parse_xmltv_datetime(start_time_str)
-                if start_dt is None:
-                    program_errors_local.append(f"Invalid 'start' time format: '{start_time_str}'.")
+                series_id_attr = program_attrib.get('series-id')
+                if not series_id_attr and not is_movie:
+                    program_errors_local.append("Suggestion: Missing 'series-id'.")
 
-            if not stop_time_str:
-                program_errors_local.append("Missing 'stop' time.")
-            else:
-                stop_dt = parse_xmltv_datetime(stop_time_str)
-                if stop_dt is None:
-                    program_errors_local.append(f"Invalid 'stop' time format: '{stop_time_str}'.")
+                if not is_movie and not any(e.text for e in episode_num_elements):
+                    program_errors_local.append("Suggestion: Missing 'episode-num'.")
 
-            if start_dt and stop_dt and start_dt >= stop_dt:
-                 program_errors_local.append(f"Start time ({start_time_str}) is equal to or after stop time ({stop_time_str}).")
+                if program_errors_local:
+                    consolidated_msg = f"EPG Program Error/Warning: Channel '{channel_id}' Program ('{program_title}' from {start_time_str or 'N/A'} to {stop_time_str or 'N/A'}): "
+                    consolidated_msg += "; ".join(program_errors_local)
+                    errors.append(consolidated_msg)
 
-            title_elements = program_element.findall('title')
-            if not title_elements or not any(t.text for t in title_elements):
-                program_errors_local.append("Missing 'title'. Essential for guide display.")
-            
-            description_elements = program_element.findall('desc')
-            if not description_elements or not any(d.text for d in description_elements):
-                program_errors_local.append("Suggestion: Missing 'desc' (description).")
-
-            category_elements = program_element.findall('category')
-            is_movie = any(c.text and c.text.lower() == 'movie' for c in category_elements)
-
-            series_id_attr = program_element.get('series-id')
-            if not series_id_attr and not is_movie:
-                program_errors_local.append("Suggestion: Missing 'series-id'.")
-
-            episode_num_elements = program_element.findall('episode-num')
-            if (not episode_num_elements or not any(e.text for e in episode_num_elements)) and not is_movie:
-                program_errors_local.append("Suggestion: Missing 'episode-num'.")
-
-            if program_errors_local:
-                consolidated_msg = f"EPG Program Error/Warning: Channel '{channel_id}' Program ('{program_title}' from {start_time_str or 'N/A'} to {stop_time_str or 'N/A'}): "
-                consolidated_msg += "; ".join(program_errors_local)
-                errors.append(consolidated_msg)
-
-            if channel_id in programs_by_channel:
-                programs_by_channel[channel_id].append({
-                    'start_dt': start_dt,
-                    'stop_dt': stop_dt,
-                    'title': program_title,
-                    'start_time_str': start_time_str,
-                    'stop_time_str': stop_time_str
-                })
+                program = Program(
+                    channel_id=channel_id,
+                    start=start_time_str,
+                    stop=stop_time_str,
+                    title=program_title
+                )
+                program_position += 1
+                if channel_id in timed_programs_by_channel:
+                    all_program_data.append(program)
+                    if start_dt and stop_dt:
+                        timed_programs_by_channel[channel_id].append((start_dt, program_position, stop_dt, program))
+                else:
+                    orphan_programs.append((start_dt, program_position, stop_dt, program))
+
+            # Free the processed element and any already-handled siblings before it.
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+        if context.root is not None and context.root.tag != 'tv':
+            errors.insert(0, "EPG Error: Root element is not 'tv'. Expected '<tv>' tag.")
+
+        # Programs listed before their <channel> are still matched, as with a full-tree parse.
+        for start_dt, position, stop_dt, program in orphan_programs:
+            if program.channel_id in timed_programs_by_channel:
+                all_program_data.append(program)
+                if start_dt and stop_dt:
+                    timed_programs_by_channel[program.channel_id].append((start_dt, position, stop_dt, program))
             else:
-                errors.append(f"EPG Error: Program references unknown channel ID '{channel_id}'.")
+                errors.append(f"EPG Error: Program references unknown channel ID '{program.channel_id}'.")
 
     except etree.XMLSyntaxError as e:
-        errors.append(f"EPG XML Syntax Error: The EPG file is not well-formed XML: {e}")
+        if isinstance(file_content, bytes) and e.code == etree.ErrorTypes.ERR_INVALID_ENCODING:
+            # Guide feeds often contain stray non-UTF-8 bytes; rather than failing the whole file,
+            # drop them and check the remaining text, as decoding the upload up front used to.
+            retry_errors, retry_channels, retry_programs = check_epg(file_content.decode('utf-8', errors='ignore'))
+            retry_errors.insert(0, f"EPG Warning: The EPG file contains bytes that are not valid UTF-8 ({e}). They were ignored.")
+            return retry_errors, retry_channels, retry_programs
+        # As with a full-tree parse, a malformed document yields no partial results: anything
+        # checked before the error is discarded and only the syntax error is reported.
+        errors = [f"EPG XML Syntax Error: The EPG file is not well-formed XML: {e}"]
+        channels = {}
+        timed_programs_by_channel = {}
+        all_program_data = []
     except Exception as e:
         errors.append(f"EPG General Error: An unexpected error occurred during EPG parsing: {e}")
 
-    for channel_id, progs in programs_by_channel.items():
-        progs_valid_times = [p for p in progs if p['start_dt'] and p['stop_dt']]
-        progs_sorted = sorted(progs_valid_times, key=lambda x: x['start_dt'])
-        
-        for i in range(len(progs_sorted) - 1):
-            current_prog = progs_sorted[i]
-            next_prog = progs_sorted[i+1]
-
-            if current_prog['stop_dt'] > next_prog['start_dt']:
-                errors.append(
-                    f"EPG Channels DVR Warning: Overlapping programs for channel '{channel_id}': "
-                    f"'{current_prog['title']}' ({current_prog['start_time_str']} - {current_prog['stop_time_str']}) "
-                    f"overlaps with '{next_prog['title']}' ({next_prog['start_time_str']} - {next_prog['stop_time_str']})."
-                )
-    
-    for channel_id, progs in programs_by_channel.items():
-        for prog in progs:
-            all_program_data.append({
-                'channel_id': channel_id,
-                'start': prog['start_time_str'],
-                'stop': prog['stop_time_str'],
-                'title': prog['title']
-            })
+    for channel_id, timed_programs in timed_programs_by_channel.items():
+        if len(timed_programs) < 2:
+            continue
+        timed_programs.sort(key=itemgetter(0, 1))
+
+        # Compare each stop with the next start entirely in C-level iterators; the Python loop
+        # below only runs for the indices that actually overlap.
+        overlaps = map(gt, map(itemgetter(2), timed_programs), map(itemgetter(0), islice(timed_programs, 1, None)))
+        for idx in compress(count(), overlaps):
+            current_prog = timed_programs[idx][3]
+            next_prog = timed_programs[idx + 1][3]
+            errors.append(
+                f"EPG Channels DVR Warning: Overlapping programs for channel '{channel_id}': "
+                f"'{current_prog.title}' ({current_prog.start} - {current_prog.stop}) "
+                f"overlaps with '{next_prog.title}' ({next_prog.start} - {next_prog.stop})."
+            )
 
     return errors, channels, all_program_data
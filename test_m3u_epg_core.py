@@ -0,0 +1,168 @@
+import threading
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from m3u_epg_core import (
+    _SANITIZE_NON_WORD_RE, _SANITIZE_SEPARATORS_RE, apply_m3u_fixes, check_epg, check_m3u,
+    fetch_content_bytes, parse_xmltv_datetime, sanitize_channel_name_for_id,
+)
+
+
+class CheckM3uAttributeTests(unittest.TestCase):
+    def test_unicode_whitespace_separates_attributes(self):
+        for separator in ('\u00a0', '\u2003'):
+            with self.subTest(separator=repr(separator)):
+                content = f'#EXTM3U\n#EXTINF:-1 tvg-id="a"{separator}tvg-name="b",Chan\nhttp://example.com/chan.m3u8\n'
+                errors, channels, fixes = check_m3u(content, 'basic')
+                self.assertEqual(channels[0].tvg_id, 'a')
+                self.assertEqual(channels[0].tvg_name, 'b')
+                self.assertEqual(fixes, [])
+
+
+def _sanitize_with_regexes(name):
+    # The general (regex) path of sanitize_channel_name_for_id, applied to any input.
+    sane_name = _SANITIZE_NON_WORD_RE.sub('', name).strip()
+    return _SANITIZE_SEPARATORS_RE.sub('_', sane_name).lower()
+
+
+class SanitizeChannelNameForIdTests(unittest.TestCase):
+    def test_ascii_fast_path_matches_regex_path(self):
+        names = [
+            '-News-', '--News', 'News--', ' - News - ', '-', '---', '- -',
+            'Fox \t News\n HD', ' \x0bA\x0c B\r', '\x1c\x1dA\x1e\x1fB',
+            'a--b', 'a__b', 'a-_-b', '_a_', 'a - _ - b', '__', '-_-',
+            '!!!', '...', '"\'"', '()[]{}', '  !?  ', '',
+            'CNN International (HD)', 'A&E: Live!', 'ESPN2_HD',
+        ]
+        for name in names:
+            with self.subTest(name=name):
+                self.assertTrue(name.isascii())
+                self.assertEqual(sanitize_channel_name_for_id(name), _sanitize_with_regexes(name))
+
+    def test_non_ascii_name_uses_regex_path(self):
+        self.assertEqual(sanitize_channel_name_for_id(' Télé-Québec \u00a0HD! '), 'télé_québec_hd')
+
+
+class ApplyM3uFixesTests(unittest.TestCase):
+    def _fix(self, content):
+        _, _, fixes = check_m3u(content, 'basic')
+        return fixes, apply_m3u_fixes(content, fixes)
+
+    def test_reorder_and_rebuild_on_the_same_entry(self):
+        content = ('#EXTM3U\n#EXTINF:-1,Chan A\n#EXTVLCOPT:x\nhttp://e/a.m3u8\n'
+                   '#EXTINF:-1 tvg-id="b",Chan B\nhttp://e/b.m3u8\n')
+        fixes, fixed = self._fix(content)
+        self.assertEqual(sorted(fix['type'] for fix in fixes), ['rebuild_extinf_attributes', 'reorder_stream_url'])
+        self.assertEqual(fixed, '#EXTM3U\n#EXTINF:-1 tvg-id="chan_a",Chan A\nhttp://e/a.m3u8\n#EXTVLCOPT:x\n'
+                                '#EXTINF:-1 tvg-id="b",Chan B\nhttp://e/b.m3u8\n')
+
+    def test_mixed_line_breaks_without_trailing_newline(self):
+        content = '#EXTM3U\r#EXTINF:-1,Chan A\r\nhttp://e/a.m3u8\x0c#EXTINF:-1,Chan B\nhttp://e/b.m3u8'
+        _, fixed = self._fix(content)
+        self.assertEqual(fixed, '#EXTM3U\r#EXTINF:-1 tvg-id="chan_a",Chan A\nhttp://e/a.m3u8\x0c'
+                                '#EXTINF:-1 tvg-id="chan_b",Chan B\nhttp://e/b.m3u8')
+
+    def test_mixed_line_breaks_with_reorder(self):
+        content = ('#EXTM3U\r\n#EXTINF:-1,Chan A\x0c#EXTVLCOPT:x\rhttp://e/a.m3u8\r\n'
+                   '#EXTINF:-1,Chan B\r\nhttp://e/b.m3u8')
+        _, fixed = self._fix(content)
+        self.assertEqual(fixed, '#EXTM3U\r\n#EXTINF:-1 tvg-id="chan_a",Chan A\nhttp://e/a.m3u8\n#EXTVLCOPT:x\r'
+                                '#EXTINF:-1 tvg-id="chan_b",Chan B\nhttp://e/b.m3u8')
+
+    def test_edited_lines_match_reported_line_numbers(self):
+        content = '#EXTM3U\r#EXTINF:-1,Chan A\x0chttp://e/a.m3u8\r\n\n#EXTINF:-1,Chan B\x85http://e/b.m3u8\n'
+        fixes, fixed = self._fix(content)
+        original_lines = content.splitlines()
+        fixed_lines = fixed.splitlines()
+        self.assertEqual(len(fixed_lines), len(original_lines))
+        for fix in fixes:
+            line_idx = fix['line_num'] - 1
+            with self.subTest(line_num=fix['line_num']):
+                self.assertTrue(original_lines[line_idx].endswith(',' + fix['channel_name']))
+                self.assertEqual(fixed_lines[line_idx], f'#EXTINF:-1 tvg-id="{fix["final_attributes"]["tvg-id"]}",{fix["channel_name"]}')
+
+
+def _programme(channel_id, start, stop, title):
+    return (f'<programme channel="{channel_id}" start="{start}" stop="{stop}">'
+            f'<title>{title}</title></programme>')
+
+
+class CheckEpgTests(unittest.TestCase):
+    def test_syntax_error_discards_partial_results(self):
+        content = ('<tv><channel id="a"><display-name>A</display-name></channel>'
+                   + _programme('a', '20240101000000', '20240101010000', 'Show')
+                   + '<broken></tv>')
+        errors, channels, programs = check_epg(content)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('EPG XML Syntax Error', errors[0])
+        self.assertEqual(channels, {})
+        self.assertEqual(programs, [])
+
+    def test_invalid_utf8_bytes_are_ignored(self):
+        content = (b'<tv><channel id="a"><display-name>Caf\xe9</display-name></channel>'
+                   b'<channel id="b"><display-name>B</display-name></channel></tv>')
+        errors, channels, _ = check_epg(content)
+        self.assertEqual(sorted(channels), ['a', 'b'])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('not valid UTF-8', errors[0])
+
+    def test_programmes_before_their_channel_keep_document_order(self):
+        # Equal start times must be compared in document order, as with a full-tree parse:
+        # 'First' overlaps 'Second', while 'Second' ends before 'Third' starts.
+        content = ('<tv>'
+                   + _programme('a', '20240101000000', '20240101003000', 'First')
+                   + '<channel id="a"><display-name>A</display-name></channel>'
+                   + _programme('a', '20240101000000', '20240101001000', 'Second')
+                   + _programme('a', '20240101002000', '20240101003000', 'Third')
+                   + '</tv>')
+        errors, _, _ = check_epg(content)
+        overlaps = [str(error) for error in errors if 'Overlapping' in str(error)]
+        self.assertEqual(len(overlaps), 1)
+        self.assertIn("'First'", overlaps[0])
+        self.assertIn("overlaps with 'Second'", overlaps[0])
+
+
+class ParseXmltvDatetimeTests(unittest.TestCase):
+    def test_only_the_leading_digits_are_parsed(self):
+        expected = datetime(2024, 1, 2, 3, 4, 5)
+        for value in ('20240102030405', '20240102030405 +0100', '20240102030405 -0500 trailing'):
+            with self.subTest(value=value):
+                self.assertEqual(parse_xmltv_datetime(value), expected)
+
+    def test_invalid_values_return_none(self):
+        for value in ('', '2024010203040', '2024010203040x', '20241301000000', '２０２４０１０２０３０４０５'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_xmltv_datetime(value))
+
+
+class _CookieHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.received_cookies.append(self.headers.get('Cookie'))
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=secret; Path=/')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchContentTests(unittest.TestCase):
+    def test_cookies_are_not_shared_between_fetches(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _CookieHandler)
+        server.received_cookies = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f'http://127.0.0.1:{server.server_port}/playlist.m3u'
+
+        for _ in range(2):
+            content, errors = fetch_content_bytes('url', url)
+            self.assertEqual((content, errors), (b'ok', []))
+        self.assertEqual(server.received_cookies, [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()